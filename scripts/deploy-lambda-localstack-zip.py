@@ -3,32 +3,73 @@
 Deployment script for .NET Lambda functions using ZIP package.
 """
 
+import argparse
+import base64
+import hashlib
+import http.client
+import json
 import os
+import shutil
 import sys
 import subprocess
 import zipfile
-import shutil
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Optional
+
+try:
+    import boto3
+    from botocore.exceptions import BotoCoreError, ClientError
+except ImportError:
+    print("❌ boto3 is not installed")
+    print("   Install it with: pip install -r scripts/requirements.txt")
+    sys.exit(1)
 
 # Configuration
 LAMBDA_NAME = "simple-lambda"
-LAMBDA_DIR = Path(__file__).parent.parent / "src" / "dotnet" / "SimpleLambda"
-LOCALSTACK_ENDPOINT = "http://localhost:4566"
+LAMBDA_DIR = Path(__file__).resolve().parent.parent / "src" / "dotnet" / "SimpleLambda"
+LOCALSTACK_HOST = "localhost"
+LOCALSTACK_PORT = 4566
+LOCALSTACK_ENDPOINT = f"http://{LOCALSTACK_HOST}:{LOCALSTACK_PORT}"
+HEALTH_CHECK_PATH = "/_localstack/health"
+AWS_REGION = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
+ZIP_COMPRESS_LEVEL = 6
+# Native and managed binaries gain little from DEFLATE, so they are stored as-is
+STORED_SUFFIXES = {".dll", ".so", ".dylib"}
+STORED_MIN_SIZE = 1 << 20
+# Below this much data to deflate, starting worker processes costs more than it saves
+PARALLEL_DEFLATE_MIN_SIZE = 8 << 20
+# Large I/O chunks keep read/write syscalls per file low
+ZIP_BUFFER_SIZE = 1 << 20
+PUBLISH_DIR = LAMBDA_DIR / "publish"
+QUIET = False  # Set from --quiet in main()
+DOTNET_ENV = {**os.environ, "DOTNET_CLI_TELEMETRY_OPTOUT": "1", "DOTNET_NOLOGO": "1"}
+
+
+def log(message: str = ""):
+    """Print a progress message unless running with --quiet."""
+    if not QUIET:
+        print(message)
 
 
 def print_step(message: str, emoji: str = "🔨"):
     """Print a step message with emoji."""
-    print(f"{emoji} {message}")
+    log(f"{emoji} {message}")
 
 
-def run_command(cmd: list, check: bool = True, capture_output: bool = False) -> subprocess.CompletedProcess:
+def run_command(cmd: list, check: bool = True, capture_output: bool = False, cwd: Path = None,
+                env: dict = None) -> subprocess.CompletedProcess:
     """Run a shell command and return the result."""
     try:
         result = subprocess.run(
             cmd,
             check=check,
             capture_output=capture_output,
-            text=True
+            text=True,
+            cwd=cwd,
+            env=env
         )
         return result
     except subprocess.CalledProcessError as e:
@@ -42,162 +83,338 @@ def run_command(cmd: list, check: bool = True, capture_output: bool = False) ->
         sys.exit(1)
 
 
-def check_prerequisites():
-    """Check if prerequisites are available."""
-    print_step("Checking prerequisites...", "🔍")
-
-    # Check .NET SDK
+def _command_available(cmd: list) -> bool:
+    """Return True if the command runs successfully."""
     try:
-        run_command(["dotnet", "--version"], capture_output=True)
-    except SystemExit:
-        print("❌ .NET SDK is not installed or not in PATH")
-        sys.exit(1)
+        return subprocess.run(cmd, capture_output=True).returncode == 0
+    except FileNotFoundError:
+        return False
 
-    # Check AWS CLI
-    try:
-        run_command(["aws", "--version"], capture_output=True)
-    except SystemExit:
-        print("❌ AWS CLI is not installed or not in PATH")
-        sys.exit(1)
 
-    # Check LocalStack
-    import urllib.request
+def probe_health() -> Optional[dict]:
+    """Fetch LocalStack health, or None if unreachable."""
+    conn = http.client.HTTPConnection(LOCALSTACK_HOST, LOCALSTACK_PORT, timeout=2)
     try:
-        with urllib.request.urlopen(f"{LOCALSTACK_ENDPOINT}/_localstack/health", timeout=2) as response:
-            if response.status == 200:
-                print("✅ Prerequisites check passed")
-                return
-    except Exception:
+        conn.request("GET", HEALTH_CHECK_PATH)
+        response = conn.getresponse()
+        body = response.read()
+        if response.status == 200:
+            return json.loads(body)
+    except (OSError, http.client.HTTPException, ValueError):
         pass
+    finally:
+        conn.close()
+    return None
 
-    print("❌ LocalStack is not accessible")
-    print("   Start it with: python scripts/setup-localstack.py")
-    sys.exit(1)
 
+def _localstack_available() -> bool:
+    """Return True if the LocalStack health endpoint responds."""
+    return probe_health() is not None
 
-def build_and_package():
-    """Build the .NET Lambda and create a ZIP package."""
+
+def check_prerequisites():
+    """Check if prerequisites are available."""
+    print_step("Checking prerequisites...", "🔍")
+
+    # The probes are independent, so run them concurrently and report every
+    # missing prerequisite at once
+    probes = {
+        ".NET SDK is not installed or not in PATH": lambda: _command_available(["dotnet", "--version"]),
+        "LocalStack is not accessible\n   Start it with: python scripts/setup-localstack.py": _localstack_available,
+    }
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        futures = {executor.submit(probe): error for error, probe in probes.items()}
+        failures = {futures[future] for future in as_completed(futures) if not future.result()}
+
+    if failures:
+        # Report in declaration order so output is stable
+        for error in probes:
+            if error in failures:
+                print(f"❌ {error}")
+        sys.exit(1)
+
+    log("✅ Prerequisites check passed")
+
+
+def fast_rmtree(*roots: Path):
+    """Remove directory trees, unlinking their files from a thread pool."""
+    files = []
+    dirs = []
+    stack = [str(root) for root in roots if root.exists()]
+    while stack:
+        path = stack.pop()
+        dirs.append(path)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    files.append(entry.path)
+
+    # Per-file deletes are latency-bound (notably on Windows), so overlap them
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(os.unlink, files))
+
+    # Directories were collected parents-first, so remove them in reverse
+    for path in reversed(dirs):
+        os.rmdir(path)
+
+
+def _compress_file(path: str) -> tuple:
+    """Deflate a file's contents and return (path, compressed, size, crc)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressor = zlib.compressobj(ZIP_COMPRESS_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(data) + compressor.flush()
+    return path, compressed, len(data), zlib.crc32(data)
+
+
+def _walk_files(root: str):
+    """Yield a DirEntry for every regular file under root, skipping obj/ directories."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name != "obj":
+                    yield from _walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _store_uncompressed(entry: os.DirEntry) -> bool:
+    """Check whether a file is a binary that DEFLATE barely shrinks."""
+    suffix = os.path.splitext(entry.name)[1]
+    return suffix in STORED_SUFFIXES or entry.stat(follow_symlinks=False).st_size > STORED_MIN_SIZE
+
+
+def write_zip(source_dir: Path, zip_path: Path):
+    """Create a ZIP of source_dir, compressing entries in parallel."""
+    # scandir entries carry their file type, avoiding a stat per path
+    files = [entry for entry in _walk_files(str(source_dir)) if not entry.name.endswith(".pdb")]
+    stored = [entry.path for entry in files if _store_uncompressed(entry)]
+    deflated = [entry for entry in files if not _store_uncompressed(entry)]
+    deflated_size = sum(entry.stat(follow_symlinks=False).st_size for entry in deflated)
+    deflated = [entry.path for entry in deflated]
+
+    # DEFLATE is the expensive part, so with enough data it runs across worker
+    # processes while the archive itself is written by this process only
+    use_pool = deflated_size >= PARALLEL_DEFLATE_MIN_SIZE
+    with (ProcessPoolExecutor() if use_pool else nullcontext()) as executor, \
+            open(zip_path, 'wb', buffering=ZIP_BUFFER_SIZE) as zip_file, \
+            zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED, allowZip64=True,
+                            compresslevel=ZIP_COMPRESS_LEVEL) as zipf:
+        if use_pool:
+            compressed_files = executor.map(_compress_file, deflated)
+
+        # Binaries are copied as-is while any workers compress the rest
+        for path in stored:
+            info = zipfile.ZipInfo.from_file(path, os.path.relpath(path, source_dir))
+            info.compress_type = zipfile.ZIP_STORED
+            with open(path, 'rb', buffering=ZIP_BUFFER_SIZE) as src, zipf.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, ZIP_BUFFER_SIZE)
+
+        if not use_pool:
+            for path in deflated:
+                zipf.write(path, os.path.relpath(path, source_dir))
+            return
+
+        for path, compressed, size, crc in compressed_files:
+            info = zipfile.ZipInfo.from_file(path, os.path.relpath(path, source_dir))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.CRC = crc
+            info.file_size = size
+            info.compress_size = len(compressed)
+
+            # Append the pre-compressed entry; zipfile has no public API for this
+            info.header_offset = zipf.fp.tell()
+            zipf.fp.write(info.FileHeader())
+            zipf.fp.write(compressed)
+            zipf.filelist.append(info)
+            zipf.NameToInfo[info.filename] = info
+            zipf.start_dir = zipf.fp.tell()
+
+
+def dotnet_verbosity() -> list:
+    """Return extra dotnet CLI arguments matching the output mode."""
+    return ["--verbosity", "quiet"] if QUIET else []
+
+
+def restore_needed() -> bool:
+    """Check whether NuGet restore is stale relative to the project files."""
+    assets_file = LAMBDA_DIR / "obj" / "project.assets.json"
+    if not assets_file.exists():
+        return True
+    assets_mtime = assets_file.stat().st_mtime
+    return any(csproj.stat().st_mtime > assets_mtime for csproj in LAMBDA_DIR.glob("*.csproj"))
+
+
+def build_lambda(clean: bool = False):
+    """Build and publish the .NET Lambda."""
     print_step("Building .NET Lambda...", "🔨")
 
     if not LAMBDA_DIR.exists():
         print(f"❌ Lambda directory not found: {LAMBDA_DIR}")
         sys.exit(1)
 
-    original_dir = Path.cwd()
+    # Clean previous builds; obj/ holds the restore state, so keep it unless asked
+    if clean:
+        fast_rmtree(LAMBDA_DIR / "bin", LAMBDA_DIR / "obj")
+    else:
+        fast_rmtree(LAMBDA_DIR / "bin")
+
+    # Restore only when the project changed since the last restore
+    if restore_needed():
+        log("   Restoring NuGet packages...")
+        run_command(["dotnet", "restore", "--nologo", *dotnet_verbosity()], cwd=LAMBDA_DIR, env=DOTNET_ENV)
+    else:
+        log("   NuGet packages are up to date, skipping restore")
+
+    # Build and publish
+    log("   Publishing Lambda function...")
+    run_command(
+        ["dotnet", "publish", "-c", "Release", "-o", str(PUBLISH_DIR), "--no-restore", "--nologo",
+         *dotnet_verbosity()],
+        cwd=LAMBDA_DIR,
+        env=DOTNET_ENV
+    )
+
+
+def package_lambda() -> Path:
+    """Create a ZIP package from the published Lambda."""
+    print_step("Creating ZIP package...", "📦")
+    zip_path = LAMBDA_DIR / "lambda.zip"
+    if zip_path.exists():
+        zip_path.unlink()
+
+    write_zip(PUBLISH_DIR, zip_path)
+
+    log(f"✅ Package created: {zip_path}")
+    return zip_path
+
+
+def compute_code_sha256(zip_path: Path) -> str:
+    """Compute the base64 SHA-256 of a package, as reported by Lambda's CodeSha256."""
+    with open(zip_path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"):
+            digest = hashlib.file_digest(f, "sha256")
+        else:
+            # Python < 3.11
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: f.read(ZIP_BUFFER_SIZE), b""):
+                digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode()
+
+
+def create_lambda_client():
+    """Create a Lambda client pointed at LocalStack, reused for every call."""
+    session = boto3.session.Session(
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "test"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "test"),
+        region_name=AWS_REGION
+    )
+    return session.client("lambda", endpoint_url=LOCALSTACK_ENDPOINT)
+
+
+def get_deployed_code_sha256(lambda_client) -> str:
+    """Return the CodeSha256 of the deployed function, or None if it does not exist."""
     try:
-        os.chdir(LAMBDA_DIR)
-
-        # Clean previous builds
-        if (LAMBDA_DIR / "bin").exists():
-            shutil.rmtree(LAMBDA_DIR / "bin")
-        if (LAMBDA_DIR / "obj").exists():
-            shutil.rmtree(LAMBDA_DIR / "obj")
-
-        # Build and publish
-        print("   Publishing Lambda function...")
-        run_command(["dotnet", "publish", "-c", "Release", "-o", "publish"])
-
-        # Create ZIP package
-        print_step("Creating ZIP package...", "📦")
-        zip_path = LAMBDA_DIR / "lambda.zip"
-        if zip_path.exists():
-            zip_path.unlink()
-
-        publish_dir = LAMBDA_DIR / "publish"
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file in publish_dir.rglob('*'):
-                if file.is_file():
-                    arcname = file.relative_to(publish_dir)
-                    zipf.write(file, arcname)
-
-        print(f"✅ Package created: {zip_path}")
-        return zip_path
+        config = lambda_client.get_function_configuration(FunctionName=LAMBDA_NAME)
+    except lambda_client.exceptions.ResourceNotFoundException:
+        return None
+    return config.get("CodeSha256")
 
-    finally:
-        os.chdir(original_dir)
 
+def fetch_deployed_state() -> tuple:
+    """Create the Lambda client and look up the deployed code hash.
+
+    Returns (lambda_client, deployed_sha); deployed_sha is None when the
+    function does not exist or LocalStack could not be queried.
+    """
+    lambda_client = create_lambda_client()
+    try:
+        return lambda_client, get_deployed_code_sha256(lambda_client)
+    except (BotoCoreError, ClientError):
+        return lambda_client, None
 
-def deploy_lambda(zip_path: Path):
+
+def deploy_lambda(zip_path: Path, lambda_client, deployed_sha: str):
     """Deploy the Lambda function using ZIP package."""
     print_step("Deploying Lambda function...", "📝")
 
-    # Read the ZIP file
-    with open(zip_path, 'rb') as f:
-        zip_content = f.read()
-
-    # Create Lambda function
-    runtime = "dotnet10"  # Use .NET 10 managed runtime
-    create_cmd = [
-        "aws",
-        "--endpoint-url", LOCALSTACK_ENDPOINT,
-        "lambda", "create-function",
-        "--function-name", LAMBDA_NAME,
-        "--runtime", runtime,
-        "--role", "arn:aws:iam::000000000000:role/lambda-role",
-        "--handler", "SimpleLambda::SimpleLambda.Function::FunctionHandler",
-        "--zip-file", f"fileb://{zip_path}",
-        "--timeout", "30",
-        "--memory-size", "512"
-    ]
-
-    result = run_command(create_cmd, check=False, capture_output=True)
-
-    if result.returncode == 0:
-        print("✅ Lambda function created!")
-    else:
-        # Function might already exist, try updating
-        if "ResourceConflictException" in result.stderr or "already exists" in result.stderr.lower():
-            print("⚠️  Lambda already exists, updating code and configuration...")
-            # Update function code
-            update_code_cmd = [
-                "aws",
-                "--endpoint-url", LOCALSTACK_ENDPOINT,
-                "lambda", "update-function-code",
-                "--function-name", LAMBDA_NAME,
-                "--zip-file", f"fileb://{zip_path}"
-            ]
-            run_command(update_code_cmd)
-            # Update runtime configuration
-            update_config_cmd = [
-                "aws",
-                "--endpoint-url", LOCALSTACK_ENDPOINT,
-                "lambda", "update-function-configuration",
-                "--function-name", LAMBDA_NAME,
-                "--runtime", runtime
-            ]
-            run_command(update_config_cmd)
-            print("✅ Lambda function updated!")
-        else:
-            print(f"❌ Failed to create Lambda function: {result.stderr}")
-            sys.exit(1)
+    # Skip the upload when the package is identical to the deployed code
+    code_sha = compute_code_sha256(zip_path)
+    if deployed_sha == code_sha:
+        log("✅ No change, skipping upload")
+        return
+
+    try:
+        # Create Lambda function
+        runtime = "dotnet10"  # Use .NET 10 managed runtime
+        zip_content = zip_path.read_bytes()
+        try:
+            lambda_client.create_function(
+                FunctionName=LAMBDA_NAME,
+                Runtime=runtime,
+                Role="arn:aws:iam::000000000000:role/lambda-role",
+                Handler="SimpleLambda::SimpleLambda.Function::FunctionHandler",
+                Code={"ZipFile": zip_content},
+                Timeout=30,
+                MemorySize=512
+            )
+            log("✅ Lambda function created!")
+        except lambda_client.exceptions.ResourceConflictException:
+            # Function already exists, update it instead
+            log("⚠️  Lambda already exists, updating code and configuration...")
+            lambda_client.update_function_code(FunctionName=LAMBDA_NAME, ZipFile=zip_content)
+            lambda_client.get_waiter("function_updated").wait(FunctionName=LAMBDA_NAME)
+            lambda_client.update_function_configuration(FunctionName=LAMBDA_NAME, Runtime=runtime)
+            log("✅ Lambda function updated!")
+    except (BotoCoreError, ClientError) as e:
+        print(f"❌ Failed to deploy Lambda function: {e}")
+        sys.exit(1)
 
 
 def print_test_instructions():
     """Print instructions for testing the Lambda."""
-    print()
-    print_step("Lambda function deployed!", "✅")
-    print()
-    print("🧪 Test the Lambda:")
-    print(f"aws --endpoint-url={LOCALSTACK_ENDPOINT} lambda invoke \\")
-    print(f"  --function-name {LAMBDA_NAME} \\")
-    print('  --payload \'{"test":"data"}\' \\')
-    print("  response.json")
-    print()
-    print("📄 View response:")
-    if sys.platform == "win32":
-        print("  type response.json")
-    else:
-        print("  cat response.json")
+    view_command = "type" if sys.platform == "win32" else "cat"
+    log("\n".join([
+        "",
+        "✅ Lambda function deployed!",
+        "",
+        "🧪 Test the Lambda:",
+        f"aws --endpoint-url={LOCALSTACK_ENDPOINT} lambda invoke \\",
+        f"  --function-name {LAMBDA_NAME} \\",
+        '  --payload \'{"test":"data"}\' \\',
+        "  response.json",
+        "",
+        "📄 View response:",
+        f"  {view_command} response.json",
+    ]))
 
 
 def main():
     """Main execution function."""
-    print("🚀 Deploying .NET Lambda to LocalStack (ZIP package)")
-    print("=" * 50)
+    parser = argparse.ArgumentParser(description="Deploy the .NET Lambda to LocalStack as a ZIP package.")
+    parser.add_argument("--clean", action="store_true", help="remove obj/ and restore NuGet packages from scratch")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args()
+
+    global QUIET
+    QUIET = args.quiet
+
+    log("🚀 Deploying .NET Lambda to LocalStack (ZIP package)")
+    log("=" * 50)
 
     check_prerequisites()
-    zip_path = build_and_package()
-    deploy_lambda(zip_path)
+
+    # The LocalStack lookup does not depend on the build, so it runs while
+    # dotnet publish does; it is joined before packaging starts worker processes
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        deployed_state = executor.submit(fetch_deployed_state)
+        build_lambda(clean=args.clean)
+        lambda_client, deployed_sha = deployed_state.result()
+
+    zip_path = package_lambda()
+    deploy_lambda(zip_path, lambda_client, deployed_sha)
     print_test_instructions()
 
 
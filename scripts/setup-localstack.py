@@ -4,15 +4,11 @@ Cross-platform script to set up LocalStack development environment.
 Works on Windows, Linux, and macOS.
 """
 
-import os
 import sys
 import subprocess
-import time
-import urllib.request
 from pathlib import Path
 
 LOCALSTACK_ENDPOINT = "http://localhost:4566"
-HEALTH_CHECK_URL = f"{LOCALSTACK_ENDPOINT}/_localstack/health"
 TIMEOUT = 60
 
 
@@ -21,14 +17,16 @@ def print_step(message: str, emoji: str = "🚀"):
     print(f"{emoji} {message}")
 
 
-def run_command(cmd: list, check: bool = True, capture_output: bool = False) -> subprocess.CompletedProcess:
+def run_command(cmd: list, check: bool = True, capture_output: bool = False,
+                cwd: Path = None) -> subprocess.CompletedProcess:
     """Run a shell command and return the result."""
     try:
         result = subprocess.run(
             cmd,
             check=check,
             capture_output=capture_output,
-            text=True
+            text=True,
+            cwd=cwd
         )
         return result
     except subprocess.CalledProcessError as e:
@@ -54,7 +52,7 @@ def check_docker():
 
 
 def start_localstack():
-    """Start LocalStack using docker-compose."""
+    """Start LocalStack using Docker Compose and wait until it is healthy."""
     print_step("Starting LocalStack...", "📦")
     
     # Find docker-compose.yml in project root
@@ -66,35 +64,13 @@ def start_localstack():
         print(f"❌ docker-compose.yml not found at {docker_compose_file}")
         sys.exit(1)
     
-    # Change to project root and run docker-compose
-    original_dir = Path.cwd()
-    try:
-        os.chdir(project_root)
-        run_command(["docker-compose", "up", "-d", "localstack"])
-    finally:
-        os.chdir(original_dir)
-
-
-def wait_for_localstack():
-    """Wait for LocalStack to be ready."""
+    # --wait blocks until the container healthcheck passes, so no polling is needed here
     print_step("Waiting for LocalStack to be ready...", "⏳")
-    
-    counter = 0
-    while counter < TIMEOUT:
-        try:
-            with urllib.request.urlopen(HEALTH_CHECK_URL, timeout=2) as response:
-                if response.status == 200:
-                    print("✅ LocalStack is ready!")
-                    return
-        except (urllib.error.URLError, OSError, TimeoutError):
-            pass
-        
-        print(f"   Waiting... ({counter}/{TIMEOUT})")
-        time.sleep(2)
-        counter += 2
-    
-    print(f"❌ LocalStack failed to start within {TIMEOUT} seconds")
-    sys.exit(1)
+    run_command(
+        ["docker", "compose", "up", "-d", "--wait", "--wait-timeout", str(TIMEOUT), "localstack"],
+        cwd=project_root
+    )
+    print("✅ LocalStack is ready!")
 
 
 def print_environment_setup():
@@ -131,7 +107,6 @@ def main():
     
     check_docker()
     start_localstack()
-    wait_for_localstack()
     print_environment_setup()
 
 
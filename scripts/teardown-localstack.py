@@ -4,7 +4,6 @@ Cross-platform script to tear down LocalStack development environment.
 Works on Windows, Linux, and macOS.
 """
 
-import os
 import sys
 import subprocess
 from pathlib import Path
@@ -15,14 +14,16 @@ def print_step(message: str, emoji: str = "🧹"):
     print(f"{emoji} {message}")
 
 
-def run_command(cmd: list, check: bool = True, capture_output: bool = False) -> subprocess.CompletedProcess:
+def run_command(cmd: list, check: bool = True, capture_output: bool = False,
+                cwd: Path = None) -> subprocess.CompletedProcess:
     """Run a shell command and return the result."""
     try:
         result = subprocess.run(
             cmd,
             check=check,
             capture_output=capture_output,
-            text=True
+            text=True,
+            cwd=cwd
         )
         return result
     except subprocess.CalledProcessError as e:
@@ -37,7 +38,7 @@ def run_command(cmd: list, check: bool = True, capture_output: bool = False) ->
 
 
 def stop_localstack():
-    """Stop LocalStack using docker-compose."""
+    """Stop LocalStack using Docker Compose."""
     print_step("Stopping LocalStack...", "🛑")
     
     # Find docker-compose.yml in project root
@@ -49,19 +50,13 @@ def stop_localstack():
         print(f"⚠️  docker-compose.yml not found at {docker_compose_file}")
         return False
     
-    # Change to project root and run docker-compose
-    original_dir = Path.cwd()
-    try:
-        os.chdir(project_root)
-        result = run_command(["docker-compose", "down"], check=False)
-        if result and result.returncode == 0:
-            print("✅ LocalStack stopped and containers removed")
-            return True
-        else:
-            print("⚠️  LocalStack may not have been running")
-            return False
-    finally:
-        os.chdir(original_dir)
+    result = run_command(["docker", "compose", "down"], check=False, cwd=project_root)
+    if result and result.returncode == 0:
+        print("✅ LocalStack stopped and containers removed")
+        return True
+    else:
+        print("⚠️  LocalStack may not have been running")
+        return False
 
 
 def remove_volumes():
@@ -104,8 +99,7 @@ def cleanup_containers():
         print(f"   Found containers: {', '.join(containers)}")
         response = input("   Remove orphaned LocalStack containers? (y/N): ")
         if response.lower() == 'y':
-            for container in containers:
-                run_command(["docker", "rm", "-f", container], check=False)
+            run_command(["docker", "rm", "-f", *containers], check=False)
             print("✅ Orphaned containers removed")
         else:
             print("   Skipping container removal")
@@ -128,8 +122,7 @@ def cleanup_images():
         print(f"   Found {len(image_ids)} LocalStack image(s)")
         response = input("   Remove LocalStack Docker images? (y/N): ")
         if response.lower() == 'y':
-            for image_id in image_ids:
-                run_command(["docker", "rmi", image_id], check=False)
+            run_command(["docker", "rmi", *sorted(image_ids)], check=False)
             print("✅ LocalStack images removed")
         else:
             print("   Skipping image removal")
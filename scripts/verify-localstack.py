@@ -4,58 +4,74 @@ Cross-platform script to verify LocalStack is accessible and running.
 Works on Windows, Linux, and macOS.
 """
 
+import io
+import os
 import sys
 import urllib.request
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
 
+try:
+    import boto3
+    from botocore.config import Config
+except ImportError:
+    print("❌ boto3 is not installed")
+    print("   Install it with: pip install -r scripts/requirements.txt")
+    sys.exit(1)
+
 LOCALSTACK_ENDPOINT = "http://localhost:4566"
 HEALTH_CHECK_URL = f"{LOCALSTACK_ENDPOINT}/_localstack/health"
+AWS_REGION = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
+CLIENT_CONFIG = Config(connect_timeout=5, read_timeout=5, retries={"max_attempts": 1})
 
 
-def print_step(message: str, emoji: str = "🔍"):
+def print_step(message: str, emoji: str = "🔍", out=None):
     """Print a step message with emoji."""
-    print(f"{emoji} {message}")
+    print(f"{emoji} {message}", file=out)
 
 
-def check_port_accessibility():
+def check_port_accessibility(out=None):
     """Check if LocalStack port is accessible."""
-    print_step("Checking if LocalStack port 4566 is accessible...", "🔌")
+    print_step("Checking if LocalStack port 4566 is accessible...", "🔌", out=out)
     
     try:
         with urllib.request.urlopen(HEALTH_CHECK_URL, timeout=5) as response:
             if response.status == 200:
-                data = json.loads(response.read().decode())
-                print("✅ LocalStack is accessible at http://localhost:4566")
-                print(f"   Version: {data.get('version', 'unknown')}")
-                print(f"   Edition: {data.get('edition', 'unknown')}")
+                data = json.load(response)
+                print("✅ LocalStack is accessible at http://localhost:4566", file=out)
+                print(f"   Version: {data.get('version', 'unknown')}", file=out)
+                print(f"   Edition: {data.get('edition', 'unknown')}", file=out)
                 
                 # Show available services
                 services = data.get('services', {})
-                available = [svc for svc, status in services.items() if status == 'available']
-                if available:
-                    print(f"   Available services: {', '.join(available[:10])}")
-                    if len(available) > 10:
-                        print(f"   ... and {len(available) - 10} more")
+                available = (svc for svc, status in services.items() if status == 'available')
+                shown = list(islice(available, 10))
+                if shown:
+                    print(f"   Available services: {', '.join(shown)}", file=out)
+                    remaining = sum(1 for _ in available)
+                    if remaining:
+                        print(f"   ... and {remaining} more", file=out)
                 
                 return True
             else:
-                print(f"⚠️  LocalStack responded with status code: {response.status}")
+                print(f"⚠️  LocalStack responded with status code: {response.status}", file=out)
                 return False
     except urllib.error.URLError as e:
-        print(f"❌ Cannot connect to LocalStack at {LOCALSTACK_ENDPOINT}")
-        print(f"   Error: {e.reason if hasattr(e, 'reason') else str(e)}")
+        print(f"❌ Cannot connect to LocalStack at {LOCALSTACK_ENDPOINT}", file=out)
+        print(f"   Error: {e.reason if hasattr(e, 'reason') else str(e)}", file=out)
         return False
     except Exception as e:
-        print(f"❌ Error checking LocalStack: {e}")
+        print(f"❌ Error checking LocalStack: {e}", file=out)
         return False
 
 
-def check_container_status():
+def check_container_status(out=None):
     """Check if LocalStack container is running."""
     import subprocess
     
-    print_step("Checking LocalStack container status...", "🐳")
+    print_step("Checking LocalStack container status...", "🐳", out=out)
     
     try:
         result = subprocess.run(
@@ -73,75 +89,90 @@ def check_container_status():
                     name = parts[0]
                     status = parts[1]
                     ports = parts[2] if len(parts) > 2 else "N/A"
-                    print(f"   Container: {name}")
-                    print(f"   Status: {status}")
-                    print(f"   Ports: {ports}")
+                    print(f"   Container: {name}", file=out)
+                    print(f"   Status: {status}", file=out)
+                    print(f"   Ports: {ports}", file=out)
             return True
         else:
-            print("❌ LocalStack container is not running")
-            print("   Start it with: python scripts/setup-localstack.py")
+            print("❌ LocalStack container is not running", file=out)
+            print("   Start it with: python scripts/setup-localstack.py", file=out)
             return False
     except FileNotFoundError:
-        print("⚠️  Docker command not found - cannot check container status")
+        print("⚠️  Docker command not found - cannot check container status", file=out)
         return None
     except subprocess.CalledProcessError as e:
-        print(f"⚠️  Error checking container: {e}")
+        print(f"⚠️  Error checking container: {e}", file=out)
         return None
 
 
-def check_registry_port():
+def check_registry_port(out=None):
     """Check if LocalStack registry port is accessible."""
-    print_step("Checking LocalStack registry port (4510)...", "📦")
+    print_step("Checking LocalStack registry port (4510)...", "📦", out=out)
     
     try:
         with urllib.request.urlopen("http://localhost:4510/v2/", timeout=2) as response:
-            print("   ✅ Registry port 4510 is accessible")
+            print("   ✅ Registry port 4510 is accessible", file=out)
             return True
     except urllib.error.URLError:
-        print("   ⚠️  Registry port 4510 is not accessible")
-        print("   This is needed for Lambda container images")
-        print("   The registry may start automatically when you push an image")
+        print("   ⚠️  Registry port 4510 is not accessible", file=out)
+        print("   This is needed for Lambda container images", file=out)
+        print("   The registry may start automatically when you push an image", file=out)
         return False
     except Exception as e:
-        print(f"   ⚠️  Error checking registry: {e}")
+        print(f"   ⚠️  Error checking registry: {e}", file=out)
         return False
 
 
-def test_basic_operations():
-    """Test basic LocalStack operations."""
-    import subprocess
-    
-    print_step("Testing basic LocalStack operations...", "🧪")
-    
-    # Test S3
+def create_clients():
+    """Create S3 and Lambda clients for LocalStack from a single session."""
+    session = boto3.session.Session(
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "test"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "test"),
+        region_name=AWS_REGION
+    )
+    # Clients are created up front: sessions are not thread-safe, clients are
+    return (
+        session.client("s3", endpoint_url=LOCALSTACK_ENDPOINT, config=CLIENT_CONFIG),
+        session.client("lambda", endpoint_url=LOCALSTACK_ENDPOINT, config=CLIENT_CONFIG),
+    )
+
+
+def _test_s3(s3_client, out=None):
+    """Test the S3 service."""
     try:
-        result = subprocess.run(
-            ["aws", "--endpoint-url", LOCALSTACK_ENDPOINT, "s3", "ls"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            print("   ✅ S3 service is working")
-        else:
-            print(f"   ⚠️  S3 test returned: {result.returncode}")
+        s3_client.list_buckets()
+        print("   ✅ S3 service is working", file=out)
+        return True
     except Exception as e:
-        print(f"   ⚠️  S3 test failed: {e}")
-    
-    # Test Lambda
+        print(f"   ⚠️  S3 test failed: {e}", file=out)
+        return False
+
+
+def _test_lambda(lambda_client, out=None):
+    """Test the Lambda service."""
     try:
-        result = subprocess.run(
-            ["aws", "--endpoint-url", LOCALSTACK_ENDPOINT, "lambda", "list-functions"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            print("   ✅ Lambda service is working")
-        else:
-            print(f"   ⚠️  Lambda test returned: {result.returncode}")
+        lambda_client.list_functions()
+        print("   ✅ Lambda service is working", file=out)
+        return True
     except Exception as e:
-        print(f"   ⚠️  Lambda test failed: {e}")
+        print(f"   ⚠️  Lambda test failed: {e}", file=out)
+        return False
+
+
+def run_probes(probes: dict) -> dict:
+    """Run independent probes concurrently, returning {name: (result, output)}.
+
+    Each probe writes to its own buffer so the caller can print the output
+    in a fixed order regardless of completion order.
+    """
+    buffers = {name: io.StringIO() for name in probes}
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        futures = {
+            executor.submit(probe, out=buffers[name]): name
+            for name, probe in probes.items()
+        }
+        results = {futures[future]: future.result() for future in as_completed(futures)}
+    return {name: (results[name], buffers[name].getvalue()) for name in probes}
 
 
 def main():
@@ -150,23 +181,29 @@ def main():
     print("=" * 50)
     print()
     
-    # Check container
-    container_running = check_container_status()
-    print()
+    # The probes are independent, so run them all at once
+    s3_client, lambda_client = create_clients()
+    results = run_probes({
+        "container": check_container_status,
+        "port": check_port_accessibility,
+        "registry": check_registry_port,
+        "s3": lambda out: _test_s3(s3_client, out),
+        "lambda": lambda out: _test_lambda(lambda_client, out),
+    })
+    container_running, container_output = results["container"]
+    port_accessible, port_output = results["port"]
+    registry_accessible, registry_output = results["registry"]
     
-    # Check port accessibility
-    port_accessible = check_port_accessibility()
-    print()
+    print(container_output)
+    print(port_output)
     
     if port_accessible:
-        # Check registry port
-        print()
-        registry_accessible = check_registry_port()
         print()
+        print(registry_output)
         
-        # Test operations
-        test_basic_operations()
-        print()
+        print_step("Testing basic LocalStack operations...", "🧪")
+        print(results["s3"][1], end="")
+        print(results["lambda"][1])
         print("✅ LocalStack is fully operational!")
         print(f"   API Endpoint: {LOCALSTACK_ENDPOINT}")
         if registry_accessible:
@@ -182,7 +219,7 @@ def main():
             print("   python scripts/setup-localstack.py")
         else:
             print("💡 Tip: Check LocalStack logs with:")
-            print("   docker-compose logs localstack")
+            print("   docker compose logs localstack")
         sys.exit(1)
 
 